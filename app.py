@@ -1,26 +1,53 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, request, jsonify, render_template, send_from_directory, g
 import os
 from dotenv import load_dotenv
 import requests
 import json
-import traceback
 import re
 import logging
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+import hashlib
+import difflib
+import threading
+import uuid
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from cache_backends import create_cache_backend
+from request_logging import setup_logging, init_request_logging, redact
+from model_router import create_model_router
 
 # Load environment variables
 load_dotenv('api.env')
 
+# Configure structured, queue-backed logging (see request_logging.py)
+setup_logging()
+
 app = Flask(__name__)
+init_request_logging(app)
 
 # Get HF API token from environment variables
 HF_API_TOKEN = os.environ.get('HF_API_TOKEN', '')
 
+# Base URL of the Hugging Face Inference API (point at fake_hf_server.py for load testing)
+HF_API_BASE_URL = os.environ.get('HF_API_BASE_URL', 'https://api-inference.huggingface.co').rstrip('/')
+
+# Shared cache tier for paraphrase results and upstream API responses (see cache_backends.py)
+shared_cache = create_cache_backend()
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 24 * 3600))
+UPSTREAM_CACHE_TTL = int(os.environ.get('UPSTREAM_CACHE_TTL', 24 * 3600))
+
+# Adaptive per-mode model routing (see model_router.py)
+model_router = create_model_router()
+SHADOW_WORKERS = int(os.environ.get('SHADOW_WORKERS', 2))
+shadow_pool = ThreadPoolExecutor(max_workers=SHADOW_WORKERS)
+# One slot per worker: shadows that can't start right away are skipped, never queued
+shadow_slots = threading.BoundedSemaphore(SHADOW_WORKERS)
+shadow_logger = logging.getLogger('paraphraser.shadow')
+
+class APIResultRejected(Exception):
+    """Raised when the API answered but its text failed the quality checks"""
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -61,46 +88,22 @@ def paraphrase():
         return jsonify({'error': 'Text exceeds 1500 character limit'}), 400
     
     try:
-        logging.info(f"Attempting to paraphrase: '{text[:50]}...' using mode: {mode}")
+        logging.info("Attempting to paraphrase %s using mode: %s", redact(text), mode)
         
-        # Use local paraphrasing if API token is missing, debug mode is on, or force_local is true
-        if not HF_API_TOKEN or os.environ.get('DEBUG_MODE', 'False').lower() == 'true' or force_local:
-            logging.info("Using local paraphrasing (no API call)")
-            paraphrased = get_local_paraphrase(text, mode)
-        else:
-            # Try API call first, fall back to local if it fails
-            try:
-                paraphrased = get_paraphrase_from_api(text, mode)
-                logging.info(f"API paraphrasing result: '{paraphrased[:50]}...'")
-            except Exception as api_error:
-                logging.warning(f"API paraphrasing failed: {str(api_error)}. Falling back to local.")
-                paraphrased = get_local_paraphrase(text, mode)
-            
-        # Validate result - ensure we got a valid string
-        if not isinstance(paraphrased, str) or not paraphrased.strip():
-            logging.warning("Invalid paraphrase result, using local fallback")
-            paraphrased = get_local_paraphrase(text, mode)
-            
-        # Clean and format text - modified to avoid NLTK issues
-        paraphrased = clean_and_format_text(paraphrased)
+        if data.get('incremental'):
+            return jsonify(paraphrase_incremental(text, mode, force_local, data.get('session_id')))
         
-        # Final quality check
-        if len(paraphrased) < 5 or paraphrased == text:
-            logging.warning("Final result invalid or identical to input, using fallback")
-            paraphrased = get_local_paraphrase(text, mode)
-            paraphrased = clean_and_format_text(paraphrased)
+        paraphrased, source = paraphrase_text(text, mode, force_local)
             
-        logging.info(f"Final paraphrased result: '{paraphrased[:50]}...'")
+        logging.info("Final paraphrased result: %s (source: %s)", redact(paraphrased), source)
         
         return jsonify({
             'result': paraphrased,
             'mode': mode,
-            'source': 'api' if not force_local and HF_API_TOKEN else 'local'
+            'source': source
         })
     except Exception as e:
-        error_trace = traceback.format_exc()
-        logging.error(f"Paraphrasing error: {str(e)}")
-        logging.error(f"Traceback: {error_trace}")
+        logging.exception("Paraphrasing error: %s", e)
         
         # Last resort fallback - if everything else fails
         try:
@@ -113,9 +116,250 @@ def paraphrase():
         except:
             return jsonify({
                 'error': f'Paraphrasing error: {str(e)}',
-                'detail': error_trace
+                'request_id': g.get('request_id')
             }), 500
 
+def use_api(force_local=False):
+    """Use local paraphrasing if API token is missing, debug mode is on, or force_local is true"""
+    return bool(HF_API_TOKEN) and os.environ.get('DEBUG_MODE', 'False').lower() != 'true' and not force_local
+
+def result_cache_key(text, mode):
+    return f"result:{sentence_hash(text, mode)}"
+
+def paraphrase_text(text, mode, force_local=False):
+    """
+    Paraphrase a piece of text, reusing API results from the shared cache when possible.
+    Returns (paraphrased, source) where source is 'api', 'cache', 'local' or 'fallback'.
+    """
+    if use_api(force_local):
+        cached = shared_cache.get(result_cache_key(text, mode))
+        if cached:
+            return cached, 'cache'
+    
+    paraphrased, source = paraphrase_uncached(text, mode, force_local)
+    
+    # Only API results are worth sharing; fallbacks should retry the API next time
+    if source == 'api':
+        shared_cache.set(result_cache_key(text, mode), paraphrased, RESULT_CACHE_TTL)
+    return paraphrased, source
+
+def paraphrase_uncached(text, mode, force_local=False, at_start=True, at_end=True):
+    """
+    Paraphrase a piece of text, preferring the API and falling back to local paraphrasing.
+    at_start/at_end say whether the text opens or closes the document (see get_local_paraphrase).
+    Returns (paraphrased, source) where source is 'api', 'local' or 'fallback'.
+    """
+    if not use_api(force_local):
+        logging.info("Using local paraphrasing (no API call)")
+        paraphrased = get_local_paraphrase(text, mode, at_start, at_end)
+        source = 'local'
+    else:
+        # Try API call first, fall back to local if it fails
+        try:
+            paraphrased = get_paraphrase_from_api(text, mode)
+            source = 'api'
+            logging.info("API paraphrasing result: %s", redact(paraphrased))
+        except Exception as api_error:
+            logging.warning("API paraphrasing failed: %s. Falling back to local.", api_error)
+            paraphrased = get_local_paraphrase(text, mode, at_start, at_end)
+            source = 'fallback'
+        
+    # Validate result - ensure we got a valid string
+    if not isinstance(paraphrased, str) or not paraphrased.strip():
+        logging.warning("Invalid paraphrase result, using local fallback")
+        paraphrased = get_local_paraphrase(text, mode, at_start, at_end)
+        source = 'fallback' if source == 'api' else source
+        
+    # Clean and format text - modified to avoid NLTK issues
+    paraphrased = clean_and_format_text(paraphrased)
+    
+    # Final quality check
+    if len(paraphrased) < 5 or paraphrased == text:
+        logging.warning("Final result invalid or identical to input, using fallback")
+        paraphrased = get_local_paraphrase(text, mode, at_start, at_end)
+        paraphrased = clean_and_format_text(paraphrased)
+        source = 'fallback' if source == 'api' else source
+    
+    return paraphrased, source
+
+# Per-session segment cache used by incremental paraphrasing.
+# Maps session id -> {'segments': OrderedDict(segment key -> {'text', 'source'}), 'output': [output sentences]}
+MAX_SESSIONS = int(os.environ.get('INCREMENTAL_MAX_SESSIONS', 500))
+MAX_SENTENCES_PER_SESSION = int(os.environ.get('INCREMENTAL_MAX_SENTENCES', 200))
+incremental_sessions = OrderedDict()
+incremental_lock = threading.Lock()
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+def split_sentences(text):
+    """Split text into sentences the same way the local paraphraser does"""
+    return [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+
+def split_with_separators(text):
+    """Split text into (separator, sentence) pairs, keeping the whitespace that precedes each sentence"""
+    parts = re.split(r'(?<=[.!?])(\s+)', text.strip())
+    pairs = [('', parts[0])] + [(parts[i], parts[i + 1]) for i in range(1, len(parts) - 1, 2)]
+    return [(sep, sentence) for sep, sentence in pairs if sentence.strip()]
+
+def sentence_hash(sentence, mode):
+    """Stable cache key for a sentence paraphrased in a given mode"""
+    return hashlib.sha1(f"{mode}\x00{sentence.strip()}".encode('utf-8')).hexdigest()
+
+def segment_key(hashes, at_start, at_end, api):
+    """
+    Cache key for a run of sentences paraphrased together. Whether the run opens or
+    closes the document is part of the key, because some modes frame those differently,
+    and so is whether the API was in use, so local results never stand in for API ones.
+    """
+    return hashlib.sha1(f"{int(at_start)}{int(at_end)}{int(api)}:{','.join(hashes)}".encode('utf-8')).hexdigest()
+
+def get_incremental_session(session_id):
+    """Fetch (or create) the cache for a session, evicting the least recently used session"""
+    with incremental_lock:
+        session = incremental_sessions.get(session_id)
+        if session is None:
+            session = {'segments': OrderedDict(), 'output': []}
+            incremental_sessions[session_id] = session
+            while len(incremental_sessions) > MAX_SESSIONS:
+                incremental_sessions.popitem(last=False)
+        else:
+            incremental_sessions.move_to_end(session_id)
+        return session
+
+def paraphrase_incremental(text, mode, force_local=False, session_id=None):
+    """
+    Paraphrase only the sentences that changed since the session's last request.
+    Unchanged segments are reused from the session's cache; each run of changed
+    sentences in a paragraph is paraphrased as one unit, in its place in the document.
+    The response includes a diff against the previous result, with positions counted
+    in sentences of the result text (as split by split_sentences).
+    """
+    session_id = session_id or uuid.uuid4().hex
+    session = get_incremental_session(session_id)
+    cache = session['segments']
+    
+    pairs = split_with_separators(text)
+    separators = [sep for sep, _ in pairs]
+    sentences = [sentence for _, sentence in pairs]
+    hashes = [sentence_hash(sentence, mode) for sentence in sentences]
+    n = len(sentences)
+    api = use_api(force_local)
+    
+    # Index just past the last sentence of each sentence's paragraph; segments never span paragraphs
+    paragraph_end = [n] * n
+    for i in range(n - 1, 0, -1):
+        paragraph_end[i - 1] = i if PARAGRAPH_BREAK.search(separators[i]) else paragraph_end[i]
+    
+    # Cover the document with the longest cached segments; uncached sentences form runs
+    segments = []  # [start, end, key, paraphrase or None]
+    with incremental_lock:
+        i = 0
+        while i < n:
+            for end in range(paragraph_end[i], i, -1):
+                key = segment_key(hashes[i:end], i == 0, end == n, api)
+                if key in cache:
+                    cache.move_to_end(key)
+                    segments.append([i, end, key, cache[key]])
+                    i = end
+                    break
+            else:
+                last = segments[-1] if segments else None
+                if last and last[3] is None and last[1] == i and paragraph_end[i] == paragraph_end[last[0]]:
+                    last[1] = i + 1
+                else:
+                    segments.append([i, i + 1, None, None])
+                i += 1
+    
+    runs = [segment for segment in segments if segment[3] is None]
+    for run in runs:
+        run[2] = segment_key(hashes[run[0]:run[1]], run[0] == 0, run[1] == n, api)
+    # Reused segments report where their text originally came from
+    sources = {segment[3]['source'] for segment in segments if segment[3] is not None}
+    
+    # Look up every changed run in the shared cache in a single round trip
+    to_cache = {}
+    if runs and api:
+        shared = shared_cache.get_many([run[2] for run in runs])
+        for run in runs:
+            if shared.get(run[2]):
+                run[3] = {'text': shared[run[2]], 'source': 'cache'}
+                to_cache[run[2]] = {'text': shared[run[2]], 'source': 'api'}
+                sources.add('cache')
+    
+    # Only runs missing from both caches cost a paraphrase round trip
+    to_share = {}
+    computed = 0
+    for run in runs:
+        start, end, key, cached = run
+        if cached is not None:
+            continue
+        computed += end - start
+        run_text = sentences[start] + ''.join(separators[k] + sentences[k] for k in range(start + 1, end))
+        paraphrased, source = paraphrase_uncached(run_text, mode, force_local, at_start=start == 0, at_end=end == n)
+        sources.add(source)
+        run[3] = {'text': paraphrased, 'source': source}
+        
+        # Fallbacks aren't kept, so the next request retries the API
+        if source == 'fallback':
+            continue
+        to_cache[key] = run[3]
+        if source == 'api':
+            to_share[key] = paraphrased
+            continue
+        
+        # The local paraphraser rewrites sentence by sentence, so when the counts line up
+        # each output sentence can be cached for its input sentence. API models may merge
+        # or reorder content across sentences, so their runs are only cached whole.
+        output_sentences = split_sentences(paraphrased)
+        if end - start > 1 and len(output_sentences) == end - start:
+            for k, output_sentence in enumerate(output_sentences, start):
+                to_cache[segment_key(hashes[k:k + 1], k == 0, k + 1 == n, api)] = {'text': output_sentence, 'source': source}
+    shared_cache.set_many(to_share, RESULT_CACHE_TTL)
+    
+    # Rejoin with the original separators so paragraph breaks survive
+    result = ''.join(separators[start] + segment['text'] if start else segment['text']
+                     for start, _, _, segment in segments)
+    output = split_sentences(result)
+    
+    with incremental_lock:
+        cache.update(to_cache)
+        while len(cache) > MAX_SENTENCES_PER_SESSION:
+            cache.popitem(last=False)
+        previous_output = session['output']
+        session['output'] = output
+    
+    logging.info("Incremental paraphrase: %d of %d sentences re-paraphrased", computed, n)
+    
+    return {
+        'result': result,
+        'mode': mode,
+        'source': next((s for s in ('fallback', 'api', 'cache', 'local') if s in sources), 'cache'),
+        'session_id': session_id,
+        'reused': n - computed,
+        'paraphrased': computed,
+        'diff': sentence_diff(previous_output, output)
+    }
+
+def sentence_diff(old, new):
+    """
+    Describe how the result's sentences changed, as a list of replace/insert/delete operations.
+    Positions index the previous and new results split into sentences.
+    """
+    ops = []
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        ops.append({
+            'op': tag,
+            'old_start': i1,
+            'old_end': i2,
+            'new_start': j1,
+            'new_end': j2,
+            'sentences': new[j1:j2]
+        })
+    return ops
+
 def clean_and_format_text(text):
     """
     Clean and format text without using NLTK to avoid dependency issues
@@ -155,9 +399,11 @@ def clean_and_format_text(text):
     
     return result.strip()
 
-def get_local_paraphrase(text, mode):
+def get_local_paraphrase(text, mode, at_start=True, at_end=True):
     """
-    Improved local paraphrasing with better text transformation
+    Improved local paraphrasing with better text transformation.
+    at_start/at_end are False when text is a run from the middle of a larger document,
+    so openers and conclusions are only added where the whole document starts or ends.
     """
     import re
     import random
@@ -330,9 +576,9 @@ def get_local_paraphrase(text, mode):
             modified = sentence
             
             # Add academic framing to some sentences
-            if i == 0 or random.random() > 0.7:  # First sentence or 30% chance
+            if (i == 0 and at_start) or random.random() > 0.7:  # First sentence or 30% chance
                 if not any(sentence.lower().startswith(term.lower()) for term in academic_phrases + connectors):
-                    prefix = random.choice(academic_phrases if i == 0 else connectors)
+                    prefix = random.choice(academic_phrases if i == 0 and at_start else connectors)
                     modified = prefix + sentence[0].lower() + sentence[1:]
             
             result.append(modified)
@@ -476,12 +722,13 @@ def get_local_paraphrase(text, mode):
             subj = random.choice(subjects)
             obj = random.choice(objects)
             
-            # Create metaphorical opening
-            metaphor = random.choice(metaphors).format(subject=subj, object=obj)
-            creative_sentences.append(f"{metaphor}, {sentences[0][0].lower()}{sentences[0][1:]}")
+            # Create metaphorical opening (only where the document starts)
+            if at_start:
+                metaphor = random.choice(metaphors).format(subject=subj, object=obj)
+                creative_sentences.append(f"{metaphor}, {sentences[0][0].lower()}{sentences[0][1:]}")
             
             # Process remaining sentences with varied structures
-            for i in range(1, len(sentences)):
+            for i in range(1 if at_start else 0, len(sentences)):
                 sentence = sentences[i]
                 if not sentence.strip():
                     continue
@@ -519,8 +766,8 @@ def get_local_paraphrase(text, mode):
                 
                 creative_sentences.append(modified)
                     
-            # Add a creative conclusion if original text is substantial
-            if len(text) > 100:
+            # Add a creative conclusion if original text is substantial and ends the document
+            if at_end and len(text) > 100:
                 conclusions = [
                     "This interplay of ideas creates a fascinating tapestry of possibilities.",
                     "Such insights open doors to worlds previously unimagined.",
@@ -538,35 +785,51 @@ def get_local_paraphrase(text, mode):
 
 def get_paraphrase_from_api(text, mode):
     """
-    Improved API function for better integration with models
+    Paraphrase with the model the router currently prefers for this mode
     """
-    # Model selection based on mode
-    if mode == 'fluency':
-        model = "tuner007/pegasus_paraphrase"
-        params = {"temperature": 0.7, "max_length": 150}  # Changed max_new_tokens to max_length
-        prepared_text = f"{text}"  # No prefix needed
-    elif mode == 'academic':
-        model = "facebook/bart-large-cnn"
-        params = {"temperature": 0.8, "max_length": 150}  # Changed parameter
-        prepared_text = f"Transform into academic language: {text}"
-    elif mode == 'simple':
-        model = "facebook/bart-large-xsum"
-        params = {"temperature": 0.6, "max_length": 120}  # Changed parameter
-        prepared_text = f"Simplify: {text}"
-    elif mode == 'creative':
-        model = "gpt2"
-        params = {"temperature": 0.9, "max_length": 200}  # Changed parameter
-        prepared_text = f"Create an imaginative version of: {text}"
-    else:
-        # Default to fluency
-        model = "tuner007/pegasus_paraphrase"
-        params = {"temperature": 0.7, "max_length": 150}  # Changed parameter
-        prepared_text = f"{text}"
+    route = model_router.choose(mode)
     
-    logging.info(f"Using model: {model} with params: {params}")
+    # Weighted shadow traffic: other candidates get a copy whose result is only recorded
+    for shadow in model_router.shadows(mode, route):
+        if not shadow_slots.acquire(blocking=False):
+            logging.debug("Skipping shadow call to %s: all shadow workers busy", shadow.model)
+            continue
+        shadow_pool.submit(contextvars.copy_context().run, run_shadow, shadow, route, text)
+    
+    return call_model(route, text)
+
+def run_shadow(route, primary, text):
+    """Send a copy of a request to a shadow candidate so it can be compared offline"""
+    start = time.perf_counter()
+    try:
+        call_model(route, text)
+        outcome = 'ok'
+    except APIResultRejected:
+        outcome = 'rejected'
+    except Exception:
+        outcome = 'error'
+    finally:
+        shadow_slots.release()
+    shadow_logger.info("Shadow %s vs %s: %s", route.model, primary.model, outcome, extra={
+        'mode': route.mode,
+        'shadow_model': route.model,
+        'primary_model': primary.model,
+        'outcome': outcome,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+    })
+
+def call_model(route, text):
+    """
+    Call one routed model and record its latency and outcome with the router
+    """
+    model = route.model
+    params = route.params
+    prepared_text = f"{route.prefix}{text}"
+    
+    logging.info("Using model: %s with params: %s", model, params)
     
     # API call to Hugging Face Inference API
-    API_URL = f"https://api-inference.huggingface.co/models/{model}"
+    API_URL = f"{HF_API_BASE_URL}/models/{model}"
     headers = {"Authorization": f"Bearer {HF_API_TOKEN}"} if HF_API_TOKEN else {}
     
     # Include model parameters in the payload
@@ -576,49 +839,44 @@ def get_paraphrase_from_api(text, mode):
         "options": {"wait_for_model": True}  # Added to wait for model to load if needed
     }
     
-    logging.info(f"Sending request to {API_URL} (attempt 1/3)")
+    # Identical upstream requests share one response across workers and replicas.
+    # The base URL is part of the key so fake-server responses never reach production.
+    upstream_key = "upstream:" + hashlib.sha1(
+        json.dumps({"url": API_URL, "payload": payload}, sort_keys=True).encode('utf-8')
+    ).hexdigest()
     
-    max_retries = 3
-    for attempt in range(1, max_retries + 1):
-        try:
-            response = requests.post(API_URL, headers=headers, json=payload, timeout=30)  # Increased timeout
-            
-            # Handle the case when model is still loading
-            if response.status_code == 503 and "loading" in response.text.lower():
-                if attempt < max_retries:
-                    logging.info(f"Model is loading. Waiting before retry {attempt+1}/3...")
-                    import time
-                    time.sleep(10)  # Longer wait for model loading
-                    continue
-            
-            if response.status_code == 200:
-                break
-            
-            if attempt < max_retries:
-                logging.warning(f"Attempt {attempt} failed with status {response.status_code}. Retrying...")
-                import time
-                time.sleep(2)  # Wait before retry
-            else:
-                logging.error(f"API request failed with status code {response.status_code}: {response.text[:200]}")
-                raise Exception(f"API request failed with status code {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries:
-                logging.warning(f"Request exception on attempt {attempt}: {str(e)}. Retrying...")
-                import time
-                time.sleep(2)  # Wait before retry
-            else:
-                logging.error(f"All API request attempts failed: {str(e)}")
-                raise Exception(f"API connection error: {str(e)}")
-    
-    # Parse the API response
+    start = time.perf_counter()
+    latency = None  # Stays None for cached responses, which are not recorded with the router
     try:
-        result = response.json()
-        logging.info(f"API response format: {type(result).__name__}")
-    except json.JSONDecodeError:
-        logging.error(f"Failed to parse JSON response: {response.text[:200]}")
-        raise Exception("Failed to parse API response")
+        result = shared_cache.get(upstream_key)
+        if result is not None:
+            logging.info("Using cached API response for model: %s", model)
+        else:
+            result = fetch_from_api(API_URL, headers, payload)
+            latency = time.perf_counter() - start
+        
+        paraphrased_text = extract_paraphrase(result, text, route.prefix)
+        
+        # Only cache responses that passed the checks, so a bad answer isn't replayed for a day
+        if latency is not None:
+            shared_cache.set(upstream_key, result, UPSTREAM_CACHE_TTL)
+    except APIResultRejected:
+        if latency is not None:
+            model_router.record(route, 'rejected', latency)
+        raise
+    except Exception:
+        # Cache lookups don't raise (SafeCache), so anything here came from calling the model
+        model_router.record(route, 'error', latency if latency is not None else time.perf_counter() - start)
+        raise
     
+    if latency is not None:
+        model_router.record(route, 'ok', latency)
+    return paraphrased_text
+
+def extract_paraphrase(result, text, prefix=''):
+    """
+    Pull the paraphrase out of an API response and reject results that are unusable
+    """
     # Better handling of different API response formats
     paraphrased_text = None
     
@@ -657,8 +915,7 @@ def get_paraphrase_from_api(text, mode):
                     paraphrased_text = value["text"]
                     break
     except Exception as e:
-        logging.error(f"Error parsing API response: {e}")
-        logging.error(f"Response content: {str(result)[:500]}")
+        logging.error("Error parsing API response: %s (response type: %s)", e, type(result).__name__)
         raise Exception(f"Failed to parse API response: {str(e)}")
     
     # If we got a valid result, return it after cleaning
@@ -669,27 +926,76 @@ def get_paraphrase_from_api(text, mode):
             "Transform into academic language:", 
             "Simplify:", "Create an imaginative version of:"
         ]
-        for prefix in common_prefixes:
-            if paraphrased_text.startswith(prefix):
-                paraphrased_text = paraphrased_text[len(prefix):].strip()
+        if prefix.strip():
+            common_prefixes.append(prefix.strip())
+        for common_prefix in common_prefixes:
+            if paraphrased_text.startswith(common_prefix):
+                paraphrased_text = paraphrased_text[len(common_prefix):].strip()
         
         # If result is just a greeting or very short, replace with a better paraphrase
         if (paraphrased_text.lower().startswith(("hi", "hello", "greetings")) or 
             len(paraphrased_text) < 10 or
             len(paraphrased_text.split()) < 3):
             logging.warning("API returned too short response, falling back to local")
-            return get_local_paraphrase(text, mode)
+            raise APIResultRejected("API returned too short response")
         
         # If the result is overly similar to the input, try local paraphrasing
         if paraphrased_text.lower() == text.lower() or similarity_score(text, paraphrased_text) > 0.9:
             logging.warning("API returned nearly identical text, falling back to local")
-            return get_local_paraphrase(text, mode)
+            raise APIResultRejected("API returned nearly identical text")
             
         return paraphrased_text
     
     # If we couldn't parse the result, fall back to local paraphrasing
     logging.warning("Could not extract text from API result, using local paraphrasing instead")
-    return get_local_paraphrase(text, mode)
+    raise APIResultRejected("Could not extract text from API result")
+
+
+def fetch_from_api(API_URL, headers, payload):
+    """
+    POST a payload to the Inference API with retries and return the parsed JSON response
+    """
+    logging.info("Sending request to %s (attempt 1/3)", API_URL)
+    
+    max_retries = 3
+    for attempt in range(1, max_retries + 1):
+        try:
+            response = requests.post(API_URL, headers=headers, json=payload, timeout=30)  # Increased timeout
+            
+            # Handle the case when model is still loading
+            if response.status_code == 503 and "loading" in response.text.lower():
+                if attempt < max_retries:
+                    logging.info("Model is loading. Waiting before retry %d/3...", attempt + 1)
+                    time.sleep(10)  # Longer wait for model loading
+                    continue
+            
+            if response.status_code == 200:
+                break
+            
+            if attempt < max_retries:
+                logging.warning("Attempt %d failed with status %d. Retrying...", attempt, response.status_code)
+                time.sleep(2)  # Wait before retry
+            else:
+                logging.error("API request failed with status code %d", response.status_code)
+                raise Exception(f"API request failed with status code {response.status_code}")
+                
+        except requests.exceptions.RequestException as e:
+            if attempt < max_retries:
+                logging.warning("Request exception on attempt %d: %s. Retrying...", attempt, e)
+                time.sleep(2)  # Wait before retry
+            else:
+                logging.error("All API request attempts failed: %s", e)
+                raise Exception(f"API connection error: {str(e)}")
+    
+    # Parse the API response
+    try:
+        result = response.json()
+        logging.info("API response format: %s", type(result).__name__)
+    except json.JSONDecodeError:
+        logging.error("Failed to parse JSON response (%d bytes)", len(response.content))
+        raise Exception("Failed to parse API response")
+    
+    return result
 
 
 def similarity_score(text1, text2):
@@ -723,6 +1029,12 @@ def get_modes():
     return jsonify(modes)
 
 
+@app.route('/model-stats', methods=['GET'])
+def model_stats():
+    """Return the routing table with each model's live stats and score"""
+    return jsonify(model_router.snapshot())
+
+
 @app.route('/api-status', methods=['GET'])
 def api_status():
     """Check if the API token is configured correctly"""
@@ -739,14 +1051,14 @@ if __name__ == '__main__':
         import nltk
         nltk.download('punkt')
     except Exception as e:
-        logging.warning(f"Failed to download NLTK resources: {e}")
+        logging.warning("Failed to download NLTK resources: %s", e)
     
     # Get port from environment variable or use 5000 as default
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
-    logging.info(f"Starting Flask app on port {port}, debug={debug}")
-    logging.info(f"HF API Token present: {'Yes' if HF_API_TOKEN else 'No'}")
-    logging.info(f"Using local fallback: {'Yes' if not HF_API_TOKEN or debug else 'Only if API fails'}")
+    logging.info("Starting Flask app on port %d, debug=%s", port, debug)
+    logging.info("HF API Token present: %s", 'Yes' if HF_API_TOKEN else 'No')
+    logging.info("Using local fallback: %s", 'Yes' if not HF_API_TOKEN or debug else 'Only if API fails')
     
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Pluggable cache backends shared by paraphrase results and upstream API responses.
+
+Select one with environment variables:
+
+    CACHE_BACKEND=memory   # default, per process
+    CACHE_BACKEND=sqlite   CACHE_PATH=paraphrase_cache.db   # shared by workers on one host
+    CACHE_MAX_ENTRIES=...  # row cap for memory (default 10000) and sqlite (default 100000)
+    CACHE_BACKEND=redis    CACHE_URL=redis://localhost:6379/0  # shared by all replicas
+    CACHE_BACKEND=none     # disable caching
+
+Values are JSON encoded and compressed (zstd when the zstandard package is installed,
+zlib otherwise). get_many/set_many touch many keys in a single round trip.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Leading byte of every stored value tells us how to decompress it
+ZLIB_CODEC = b'z'
+ZSTD_CODEC = b's'
+
+def encode_value(value):
+    """Serialize a JSON-compatible value into a compact compressed entry"""
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    if zstandard is not None:
+        return ZSTD_CODEC + zstandard.ZstdCompressor(level=3).compress(raw)
+    return ZLIB_CODEC + zlib.compress(raw, 6)
+
+def decode_value(entry):
+    """Inverse of encode_value"""
+    codec, payload = entry[:1], entry[1:]
+    if codec == ZSTD_CODEC:
+        if zstandard is None:
+            raise ValueError("Entry is zstd compressed but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == ZLIB_CODEC:
+        raw = zlib.decompress(payload)
+    else:
+        raise ValueError(f"Unknown cache codec: {codec!r}")
+    return json.loads(raw.decode('utf-8'))
+
+
+class CacheBackend:
+    """Interface every cache backend implements. Missing keys are simply absent from results."""
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached"""
+        raise NotImplementedError
+
+    def set_many(self, items, ttl=None):
+        """Store every {key: value} pair, expiring after ttl seconds if given"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything"""
+
+    def get_many(self, keys):
+        return {}
+
+    def set_many(self, items, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache. Fast, but not shared between workers or replicas."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at or None, encoded value)
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at is not None and expires_at <= now:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                found[key] = value
+        return {key: decode_value(value) for key, value in found.items()}
+
+    def set_many(self, items, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        encoded = {key: encode_value(value) for key, value in items.items()}
+        with self.lock:
+            for key, value in encoded.items():
+                self.entries[key] = (expires_at, value)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    On-disk cache in a SQLite file, shared by all workers on the same host.
+    Every purge_every writes, expired rows are deleted and the oldest rows beyond
+    max_entries are evicted, so the file doesn't grow without bound.
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    MAX_KEYS_PER_QUERY = 500
+
+    def __init__(self, path='paraphrase_cache.db', max_entries=100000, purge_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self.writes = 0
+        self.writes_lock = threading.Lock()
+        self.local = threading.local()
+        conn = self.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        conn.commit()
+
+    def connection(self):
+        """One connection per thread; WAL lets readers and a writer work concurrently"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        conn = self.connection()
+        for start in range(0, len(keys), self.MAX_KEYS_PER_QUERY):
+            chunk = keys[start:start + self.MAX_KEYS_PER_QUERY]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders}) "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (*chunk, now)
+            ).fetchall()
+            for key, value in rows:
+                found[key] = decode_value(bytes(value))
+        return found
+
+    def set_many(self, items, ttl=None):
+        if not items:
+            return
+        expires_at = time.time() + ttl if ttl else None
+        rows = [(key, encode_value(value), expires_at) for key, value in items.items()]
+        conn = self.connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", rows)
+        with self.writes_lock:
+            self.writes += 1
+            due = self.writes % self.purge_every == 0
+        if due:
+            self.purge()
+
+    def purge(self):
+        """Delete expired rows, then the oldest rows beyond max_entries"""
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            if self.max_entries:
+                # INSERT OR REPLACE gives every write a new rowid, so low rowids are the oldest writes
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY rowid "
+                    "LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?))",
+                    (self.max_entries,)
+                )
+
+    def delete(self, key):
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache on any Redis-protocol server, shared by all workers and replicas.
+    Pass an existing client (e.g. fakeredis.FakeRedis()) or a redis:// URL.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', client=None, prefix='paraphraser:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        # MGET fetches every key in one round trip
+        values = self.client.mget([self.prefix + key for key in keys])
+        return {key: decode_value(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items, ttl=None):
+        if not items:
+            return
+        # Pipeline the writes so a batch costs one round trip
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.prefix + key, encode_value(value), ex=int(ttl) if ttl else None)
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class SafeCache(CacheBackend):
+    """Wraps a backend so cache outages degrade to misses instead of failing requests"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_many(self, keys):
+        try:
+            return self.backend.get_many(keys)
+        except Exception as e:
+            logging.warning("Cache read failed: %s", e)
+            return {}
+
+    def set_many(self, items, ttl=None):
+        try:
+            self.backend.set_many(items, ttl)
+        except Exception as e:
+            logging.warning("Cache write failed: %s", e)
+
+    def delete(self, key):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            logging.warning("Cache delete failed: %s", e)
+
+
+def create_cache_backend(name=None):
+    """Build the backend selected by CACHE_BACKEND (or the name given)"""
+    name = (name or os.environ.get('CACHE_BACKEND', 'memory')).lower()
+    if name == 'none':
+        backend = NullCache()
+    elif name == 'memory':
+        backend = MemoryCache(int(os.environ.get('CACHE_MAX_ENTRIES', 10000)))
+    elif name == 'sqlite':
+        backend = SQLiteCache(
+            os.environ.get('CACHE_PATH', 'paraphrase_cache.db'),
+            max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 100000))
+        )
+    elif name == 'redis':
+        backend = RedisCache(os.environ.get('CACHE_URL', 'redis://localhost:6379/0'))
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+    logging.info("Using %s for paraphrase caching", type(backend).__name__)
+    return SafeCache(backend)
@@ -0,0 +1,173 @@
+"""
+Local stand-in for the Hugging Face Inference API, used for load testing.
+
+Run it, then start app.py with HF_API_BASE_URL pointing at it:
+
+    python fake_hf_server.py --port 8008 --loading-rate 0.05 --slow-rate 0.1
+    HF_API_BASE_URL=http://127.0.0.1:8008 HF_API_TOKEN=fake python app.py
+
+Faults can be injected three ways:
+  - randomly, with the --*-rate command line flags
+  - at runtime, by POSTing new rates to /_faults
+  - per request, with an X-Fake-Fault header (loading, rate_limit, slow, malformed, identical)
+"""
+from flask import Flask, request, jsonify, Response
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+app = Flask(__name__)
+
+# Probability of each fault, checked in this order on every request
+faults = {
+    'loading': 0.0,
+    'rate_limit': 0.0,
+    'slow': 0.0,
+    'malformed': 0.0,
+    'identical': 0.0
+}
+settings = {
+    'latency': 0.05,        # Base latency of every response, in seconds
+    'slow_seconds': 5.0,    # Extra latency added by the "slow" fault
+    'shape': 'auto'         # auto, list or dict
+}
+stats = {'requests': 0}
+stats_lock = threading.Lock()
+
+# Prompt prefixes the routes in model_router.DEFAULT_ROUTES add per mode
+PROMPT_PREFIXES = [
+    "Transform into academic language:",
+    "Simplify:",
+    "Create an imaginative version of:",
+    "paraphrase:"
+]
+
+# Response key per model, following the task each model is served under on the Inference API.
+# Unlisted models default to generated_text.
+RESPONSE_KEYS = {
+    "facebook/bart-large-cnn": "summary_text",
+    "facebook/bart-large-xsum": "summary_text",
+    "tuner007/pegasus_paraphrase": "generated_text",
+    "humarin/chatgpt_paraphraser_on_T5_base": "generated_text",
+    "eugenesiow/bart-paraphrase": "generated_text",
+    "gpt2": "generated_text"
+}
+
+# Text generation models echo the prompt before the continuation
+ECHOES_PROMPT = {"gpt2"}
+
+def count(key):
+    with stats_lock:
+        stats[key] = stats.get(key, 0) + 1
+
+def pick_fault():
+    """Choose the fault for this request from the header or the configured rates"""
+    header = request.headers.get('X-Fake-Fault')
+    if header:
+        return header
+    for fault, rate in faults.items():
+        if rate and random.random() < rate:
+            return fault
+    return None
+
+def fake_paraphrase(text):
+    """Cheap deterministic rewrite that passes the app's similarity and length checks"""
+    for prefix in PROMPT_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip()
+    words = text.split()
+    kept = [word for i, word in enumerate(words) if i % 4 != 3]
+    return "In other words, it can be said that " + ' '.join(kept)
+
+def build_response(model, text):
+    """Mimic the response shapes of the models used by get_paraphrase_from_api"""
+    shape = settings['shape']
+    key = RESPONSE_KEYS.get(model, 'generated_text')
+    if model in ECHOES_PROMPT:
+        text = f"{text} {fake_paraphrase(text)}"
+    else:
+        text = fake_paraphrase(text)
+    if shape == 'dict':
+        return {key: text}
+    if shape == 'auto' and random.random() < 0.1:
+        return {key: text}
+    return [{key: text}]
+
+@app.route('/models/<path:model>', methods=['POST'])
+def inference(model):
+    count('requests')
+    data = request.get_json(silent=True) or {}
+    text = data.get('inputs', '')
+    fault = pick_fault()
+
+    time.sleep(settings['latency'])
+
+    if fault == 'loading':
+        count('loading')
+        return jsonify({'error': f'Model {model} is currently loading', 'estimated_time': 20.0}), 503
+    if fault == 'rate_limit':
+        count('rate_limit')
+        return jsonify({'error': 'Rate limit reached. Please log in or use your apiToken'}), 429
+    if fault == 'slow':
+        count('slow')
+        time.sleep(settings['slow_seconds'])
+    if fault == 'malformed':
+        count('malformed')
+        return Response('[{"generated_text": "truncated', status=200, mimetype='application/json')
+    if fault == 'identical':
+        count('identical')
+        return jsonify([{'generated_text': text}])
+
+    count('ok')
+    return jsonify(build_response(model, text))
+
+@app.route('/_faults', methods=['GET', 'POST'])
+def configure_faults():
+    """Read or update fault rates and settings at runtime"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        for key, value in data.items():
+            if key in faults:
+                faults[key] = float(value)
+            elif key in settings:
+                settings[key] = value if key == 'shape' else float(value)
+            else:
+                return jsonify({'error': f'Unknown setting: {key}'}), 400
+    return jsonify({'faults': faults, 'settings': settings})
+
+@app.route('/_stats', methods=['GET', 'DELETE'])
+def get_stats():
+    """Return request counters per outcome, or reset them"""
+    with stats_lock:
+        if request.method == 'DELETE':
+            stats.clear()
+            stats['requests'] = 0
+        return Response(json.dumps(stats), mimetype='application/json')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Hugging Face Inference API for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency', type=float, default=0.05, help='base latency in seconds')
+    parser.add_argument('--slow-seconds', type=float, default=5.0, help='extra latency of slow responses')
+    parser.add_argument('--shape', choices=['auto', 'list', 'dict'], default='auto')
+    for fault in faults:
+        parser.add_argument(f"--{fault.replace('_', '-')}-rate", type=float, default=0.0,
+                            help=f'probability of a {fault} response')
+    args = parser.parse_args()
+
+    settings.update(latency=args.latency, slow_seconds=args.slow_seconds, shape=args.shape)
+    for fault in faults:
+        faults[fault] = getattr(args, f'{fault}_rate')
+
+    logging.info(f"Fake HF API on http://{args.host}:{args.port} with faults {faults}")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,145 @@
+"""
+Load generator for the /paraphrase endpoint.
+
+Drives the Flask app at a target request rate with bounded concurrency and reports
+throughput, latency percentiles, and the share of responses per source and error.
+Pair it with fake_hf_server.py to exercise the retry and fallback paths safely. Run the
+app with CACHE_BACKEND=none, or pass --vary-text, so responses aren't served from cache:
+
+    python load_test.py --url http://127.0.0.1:5000 --rps 20 --concurrency 10 --duration 30 --vary-text
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SAMPLE_TEXTS = {
+    'fluency': "Machine learning is a method of data analysis that automates analytical model building. It is a branch of artificial intelligence based on the idea that systems can learn from data, identify patterns and make decisions with minimal human intervention.",
+    'academic': "The empirical evidence suggests that there is a strong correlation between socioeconomic status and educational outcomes. Further research is necessary to understand the causal mechanisms underlying this relationship.",
+    'simple': "Climate change is making the Earth warmer. This happens because we burn too much oil and gas. We need to use more renewable energy to solve this problem.",
+    'creative': "The sunset painted the sky with hues of orange and pink, as the day bid farewell to make way for the night. Stars began to appear, like diamonds scattered across a velvet canvas."
+}
+
+thread_state = threading.local()
+
+def get_session():
+    """One HTTP session per worker thread so connections are reused"""
+    if not hasattr(thread_state, 'session'):
+        thread_state.session = requests.Session()
+    return thread_state.session
+
+def send_request(url, payload, timeout):
+    """Send one paraphrase request and return (latency, outcome)"""
+    start = time.perf_counter()
+    try:
+        response = get_session().post(f"{url}/paraphrase", json=payload, timeout=timeout)
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return latency, f"http_{response.status_code}"
+        data = response.json()
+        if data.get('error'):
+            return latency, 'error'
+        return latency, data.get('source', 'unknown')
+    except requests.exceptions.Timeout:
+        return time.perf_counter() - start, 'timeout'
+    except (requests.exceptions.RequestException, json.JSONDecodeError):
+        return time.perf_counter() - start, 'connection_error'
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def make_text(mode, sequence, vary_text=False):
+    """Sample text for a mode, made unique per request when vary_text is set to defeat caching"""
+    text = SAMPLE_TEXTS[mode]
+    if vary_text:
+        text = f"{text} This is request number {sequence}."
+    return text
+
+def run(url, rps, concurrency, duration, modes, force_local=False, timeout=60, vary_text=False):
+    """Issue requests at the target rate for the given duration and collect results"""
+    results = []
+    results_lock = threading.Lock()
+    # Never queue more requests than there are workers, so latency isn't hidden in the queue
+    slots = threading.BoundedSemaphore(concurrency)
+    dropped = 0
+
+    def worker(payload):
+        try:
+            outcome = send_request(url, payload, timeout)
+            with results_lock:
+                results.append(outcome)
+        finally:
+            slots.release()
+
+    interval = 1.0 / rps
+    started = time.perf_counter()
+    next_send = started
+    sent = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while time.perf_counter() - started < duration:
+            now = time.perf_counter()
+            if now < next_send:
+                time.sleep(next_send - now)
+            next_send += interval
+            if not slots.acquire(blocking=False):
+                # All workers busy: the app can't keep up with the target rate
+                dropped += 1
+                continue
+            mode = modes[sent % len(modes)]
+            payload = {'text': make_text(mode, sent, vary_text), 'mode': mode, 'force_local': force_local}
+            pool.submit(worker, payload)
+            sent += 1
+    elapsed = time.perf_counter() - started
+
+    return summarize(results, elapsed, dropped)
+
+def summarize(results, elapsed, dropped):
+    """Turn raw (latency, outcome) pairs into a report"""
+    latencies = sorted(latency for latency, _ in results)
+    outcomes = Counter(outcome for _, outcome in results)
+    total = len(results)
+    successes = sum(outcomes[source] for source in ('api', 'local', 'fallback', 'cache', 'emergency_fallback'))
+    return {
+        'requests': total,
+        'dropped': dropped,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p90': round(percentile(latencies, 90) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+            'max': round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        'fallback_rate': round((outcomes['fallback'] + outcomes['emergency_fallback']) / total, 4) if total else 0.0,
+        'error_rate': round((total - successes) / total, 4) if total else 0.0,
+        'outcomes': dict(outcomes)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the /paraphrase endpoint')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='base URL of the Flask app')
+    parser.add_argument('--rps', type=float, default=10.0, help='target requests per second')
+    parser.add_argument('--concurrency', type=int, default=10, help='maximum in-flight requests')
+    parser.add_argument('--duration', type=float, default=30.0, help='test length in seconds')
+    parser.add_argument('--mode', action='append', choices=list(SAMPLE_TEXTS),
+                        help='mode(s) to request, cycled in order (default: all)')
+    parser.add_argument('--force-local', action='store_true', help='send force_local to skip the API')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request timeout in seconds')
+    parser.add_argument('--vary-text', action='store_true',
+                        help='make every request text unique so the app cache is never hit')
+    args = parser.parse_args()
+
+    report = run(args.url.rstrip('/'), args.rps, args.concurrency, args.duration,
+                 args.mode or list(SAMPLE_TEXTS), args.force_local, args.timeout, args.vary_text)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,246 @@
+"""
+Adaptive model routing for the Hugging Face Inference API.
+
+Each mode has several candidate models. For every request the router picks the candidate
+with the lowest expected time to a usable result, estimated from live stats:
+
+    score = latency EWMA / (1 - error rate EWMA - rejection rate EWMA)
+
+A small share of traffic explores other candidates so their stats stay fresh, and each
+candidate can receive weighted shadow traffic whose results are only recorded, never
+returned. Stats are saved to disk and reloaded on restart.
+
+Configured with environment variables:
+
+    MODEL_ROUTES=model_routes.json          # optional routing table, same shape as DEFAULT_ROUTES
+    ROUTER_STATS_PATH=model_router_stats.json
+    ROUTER_EXPLORE_RATE=0.05
+    ROUTER_PRIOR_LATENCY=3.0                 # assumed latency (seconds) of models with no data
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+DEFAULT_ROUTES = {
+    'fluency': [
+        {"model": "tuner007/pegasus_paraphrase", "params": {"temperature": 0.7, "max_length": 150}, "prefix": ""},
+        {"model": "humarin/chatgpt_paraphraser_on_T5_base", "params": {"temperature": 0.7, "max_length": 150}, "prefix": "paraphrase: "},
+        {"model": "eugenesiow/bart-paraphrase", "params": {"temperature": 0.7, "max_length": 150}, "prefix": ""}
+    ],
+    'academic': [
+        {"model": "facebook/bart-large-cnn", "params": {"temperature": 0.8, "max_length": 150}, "prefix": "Transform into academic language: "},
+        {"model": "humarin/chatgpt_paraphraser_on_T5_base", "params": {"temperature": 0.6, "max_length": 150}, "prefix": "paraphrase: "}
+    ],
+    'simple': [
+        {"model": "facebook/bart-large-xsum", "params": {"temperature": 0.6, "max_length": 120}, "prefix": "Simplify: "},
+        {"model": "eugenesiow/bart-paraphrase", "params": {"temperature": 0.6, "max_length": 120}, "prefix": ""}
+    ],
+    'creative': [
+        {"model": "gpt2", "params": {"temperature": 0.9, "max_length": 200}, "prefix": "Create an imaginative version of: "},
+        {"model": "humarin/chatgpt_paraphraser_on_T5_base", "params": {"temperature": 1.0, "max_length": 200}, "prefix": "paraphrase: "}
+    ]
+}
+
+# Keys a routing table candidate may have (the arguments of Route besides mode)
+ROUTE_KEYS = {'model', 'params', 'prefix', 'shadow_weight', 'enabled'}
+
+# Weight of the newest observation in every moving average
+EWMA_ALPHA = 0.2
+# Never treat a model as less than 5% successful, so scores stay finite
+MIN_SUCCESS_RATE = 0.05
+
+
+class ModelStats:
+    """Live stats for one model serving one mode"""
+
+    def __init__(self, requests=0, errors=0, rejections=0, latency_ewma=None, error_ewma=0.0, reject_ewma=0.0):
+        self.requests = requests
+        self.errors = errors
+        self.rejections = rejections
+        self.latency_ewma = latency_ewma
+        self.error_ewma = error_ewma
+        self.reject_ewma = reject_ewma
+
+    def record(self, outcome, latency=None):
+        """Fold in one call. outcome is 'ok', 'rejected' or 'error'; latency is None for cached responses."""
+        self.requests += 1
+        self.errors += outcome == 'error'
+        self.rejections += outcome == 'rejected'
+        self.error_ewma += EWMA_ALPHA * ((outcome == 'error') - self.error_ewma)
+        self.reject_ewma += EWMA_ALPHA * ((outcome == 'rejected') - self.reject_ewma)
+        if latency is not None:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += EWMA_ALPHA * (latency - self.latency_ewma)
+
+    def score(self, prior_latency):
+        """Expected seconds spent per usable result; lower is better"""
+        latency = self.latency_ewma if self.latency_ewma is not None else prior_latency
+        success_rate = max(MIN_SUCCESS_RATE, 1.0 - self.error_ewma - self.reject_ewma)
+        return latency / success_rate
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class Route:
+    """One candidate model for a mode"""
+
+    def __init__(self, mode, model, params=None, prefix='', shadow_weight=0.0, enabled=True):
+        self.mode = mode
+        self.model = model
+        self.params = params or {}
+        self.prefix = prefix
+        self.shadow_weight = shadow_weight
+        self.enabled = enabled
+
+    @property
+    def key(self):
+        return f"{self.mode}|{self.model}"
+
+
+class ModelRouter:
+    """Chooses a model per mode from live stats and keeps those stats persisted"""
+
+    def __init__(self, routes, stats_path=None, explore_rate=0.05, prior_latency=3.0, save_interval=30.0):
+        self.routes = {
+            mode: [Route(mode, **candidate) for candidate in candidates]
+            for mode, candidates in routes.items()
+        }
+        self.stats_path = stats_path
+        self.explore_rate = explore_rate
+        self.prior_latency = prior_latency
+        self.save_interval = save_interval
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.last_saved = time.time()
+        self.load()
+
+    def candidates(self, mode):
+        """Enabled routes for a mode, falling back to fluency for unknown modes"""
+        routes = self.routes.get(mode) or self.routes['fluency']
+        return [route for route in routes if route.enabled]
+
+    def stats_for(self, route):
+        stats = self.stats.get(route.key)
+        if stats is None:
+            stats = self.stats[route.key] = ModelStats()
+        return stats
+
+    def choose(self, mode):
+        """Pick the best-scoring candidate, occasionally exploring another one"""
+        candidates = self.candidates(mode)
+        if len(candidates) > 1 and random.random() < self.explore_rate:
+            return random.choice(candidates)
+        with self.lock:
+            # min() keeps the first listed candidate on ties, so the table order is the default preference
+            return min(candidates, key=lambda route: self.stats_for(route).score(self.prior_latency))
+
+    def shadows(self, mode, chosen):
+        """Candidates that should also receive a copy of this request, by their shadow weight"""
+        return [
+            route for route in self.candidates(mode)
+            if route is not chosen and route.shadow_weight and random.random() < route.shadow_weight
+        ]
+
+    def record(self, route, outcome, latency=None):
+        with self.lock:
+            self.stats_for(route).record(outcome, latency)
+            due = self.stats_path and time.time() - self.last_saved >= self.save_interval
+            if due:
+                # Claim this save now so concurrent requests don't all start one
+                self.last_saved = time.time()
+        if due:
+            # Write from a background thread so the request never waits on disk I/O
+            threading.Thread(target=self.save, name='router-stats-save', daemon=True).start()
+
+    def snapshot(self):
+        """Current routing table with stats and scores, e.g. for offline comparison"""
+        with self.lock:
+            return {
+                mode: [
+                    {
+                        'model': route.model,
+                        'enabled': route.enabled,
+                        'shadow_weight': route.shadow_weight,
+                        'score': round(self.stats_for(route).score(self.prior_latency), 3),
+                        **self.stats_for(route).to_dict()
+                    }
+                    for route in routes
+                ]
+                for mode, routes in self.routes.items()
+            }
+
+    def load(self):
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path) as f:
+                saved = json.load(f)
+            self.stats = {key: ModelStats(**values) for key, values in saved.items()}
+            logging.info("Loaded model router stats for %d routes from %s", len(self.stats), self.stats_path)
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning("Could not load model router stats from %s: %s", self.stats_path, e)
+
+    def save(self):
+        """
+        Write stats atomically so a crash never leaves a half-written file.
+        Each worker writes its own view, so with several workers the last writer wins.
+        """
+        if not self.stats_path:
+            return
+        with self.lock:
+            data = {key: stats.to_dict() for key, stats in self.stats.items()}
+            self.last_saved = time.time()
+        directory = os.path.dirname(os.path.abspath(self.stats_path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.router-stats-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            logging.warning("Could not save model router stats to %s: %s", self.stats_path, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def validate_routes(routes, default_mode='fluency'):
+    """Reject routing tables the router can't serve every mode from"""
+    if default_mode not in routes:
+        raise ValueError(f"Model routing table must define the default mode '{default_mode}'")
+    for mode, candidates in routes.items():
+        if not any(candidate.get('enabled', True) for candidate in candidates):
+            raise ValueError(f"Model routing table has no enabled candidate for mode '{mode}'")
+        for candidate in candidates:
+            unknown = set(candidate) - ROUTE_KEYS
+            if unknown:
+                raise ValueError(
+                    f"Model routing candidate for mode '{mode}' has unknown keys {sorted(unknown)}; "
+                    f"allowed keys are {sorted(ROUTE_KEYS)}"
+                )
+            if not candidate.get('model'):
+                raise ValueError(f"Model routing candidate for mode '{mode}' has no model")
+
+def create_model_router():
+    """Build the router from MODEL_ROUTES (or the defaults) and register saving on exit"""
+    routes = DEFAULT_ROUTES
+    routes_path = os.environ.get('MODEL_ROUTES')
+    if routes_path:
+        with open(routes_path) as f:
+            routes = json.load(f)
+    validate_routes(routes)
+    router = ModelRouter(
+        routes,
+        stats_path=os.environ.get('ROUTER_STATS_PATH', 'model_router_stats.json'),
+        explore_rate=float(os.environ.get('ROUTER_EXPLORE_RATE', 0.05)),
+        prior_latency=float(os.environ.get('ROUTER_PRIOR_LATENCY', 3.0))
+    )
+    atexit.register(router.save)
+    return router
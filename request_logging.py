@@ -0,0 +1,156 @@
+"""
+Structured, low-overhead request logging.
+
+Log records are handed to a queue and written by a background QueueListener thread,
+so request threads never block on log I/O or pay for formatting. Every record carries
+the id of the request that produced it, and INFO/DEBUG records can be sampled per route.
+
+Configured with environment variables:
+
+    LOG_LEVEL=INFO
+    LOG_FORMAT=json            # or "text"
+    LOG_SAMPLE_RATES=/paraphrase=0.1,/api-status=0   # keep 10% of /paraphrase requests, none of /api-status
+    LOG_USER_TEXT=false        # user text is left out of logs unless this is true
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+import uuid
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+route_var = contextvars.ContextVar('route', default=None)
+sampled_var = contextvars.ContextVar('sampled', default=True)
+
+# Client-supplied request ids are only trusted if they look like one
+VALID_REQUEST_ID = re.compile(r'[A-Za-z0-9-]{1,64}')
+
+# Attributes every LogRecord has; anything else was passed through extra= and is logged as a field
+STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+def log_user_text():
+    return os.environ.get('LOG_USER_TEXT', 'False').lower() == 'true'
+
+def redact(text, limit=50):
+    """Describe user text for logging without including it, unless LOG_USER_TEXT is enabled"""
+    if log_user_text():
+        return repr(text[:limit])
+    return f"<{len(text)} chars>"
+
+def parse_sample_rates(spec):
+    """Parse "route=rate,route=rate" into a dict"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, rate = item.partition('=')
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_RECORD_ATTRS and not key.startswith('_') and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id and route, and drop records from unsampled requests"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        # Warnings and errors are always kept, whatever the sampling decision
+        return record.levelno >= logging.WARNING or sampled_var.get()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+    The stock prepare() formats the message in the calling thread; records are only
+    ever consumed in this process, so they can be queued as they are.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging():
+    """Route all logging through a queue drained by a background writer thread"""
+    level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    if os.environ.get('LOG_FORMAT', 'json').lower() == 'text':
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s')
+    else:
+        formatter = JsonFormatter()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def init_request_logging(app):
+    """Give every request an id and a per-route sampling decision"""
+    from flask import request, g
+
+    sample_rates = parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES', ''))
+    logger = logging.getLogger('paraphraser.access')
+
+    @app.before_request
+    def start_request_logging():
+        request_id = request.headers.get('X-Request-ID', '')
+        if not VALID_REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        route = request.url_rule.rule if request.url_rule else request.path
+        rate = sample_rates.get(route, 1.0)
+        g.log_tokens = (
+            request_id_var.set(request_id),
+            route_var.set(route),
+            sampled_var.set(rate >= 1.0 or random.random() < rate)
+        )
+        g.request_id = request_id
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def finish_request_logging(response):
+        request_id = getattr(g, 'request_id', None)
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+            logger.info("%s %s %s", request.method, request.path, response.status_code,
+                        extra={'status': response.status_code,
+                               'duration_ms': round((time.perf_counter() - g.request_start) * 1000, 1)})
+        return response
+
+    @app.teardown_request
+    def reset_request_logging(exc):
+        tokens = getattr(g, 'log_tokens', None)
+        if tokens:
+            for var, token in zip((request_id_var, route_var, sampled_var), tokens):
+                var.reset(token)
@@ -22,6 +22,9 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentMode = 'fluency';
     let apiStatus = false;
     const maxCharLimit = 1500;
+    let sessionId = sessionStorage.getItem('paraphraser-session') || null;
+    // Incremental re-paraphrasing is opt-in: localStorage.setItem('paraphraser-incremental', 'true')
+    const incrementalMode = localStorage.getItem('paraphraser-incremental') === 'true';
     
     // Initialize the application
     init();
@@ -313,7 +316,13 @@ document.addEventListener('DOMContentLoaded', function() {
           const response = await fetch('/paraphrase', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ text, mode, force_local: forceLocal })
+            body: JSON.stringify({
+              text,
+              mode,
+              force_local: forceLocal,
+              incremental: incrementalMode,
+              session_id: incrementalMode ? sessionId : null
+            })
           });
           
           // Check for HTTP errors
@@ -330,6 +339,15 @@ document.addEventListener('DOMContentLoaded', function() {
             throw new Error(data.error);
           }
           
+          // Remember the session so unchanged sentences are reused next time
+          if (data.session_id && data.session_id !== sessionId) {
+            sessionId = data.session_id;
+            sessionStorage.setItem('paraphraser-session', sessionId);
+          }
+          if (data.diff) {
+            console.log(`Re-paraphrased ${data.paraphrased} sentence(s), reused ${data.reused}`);
+          }
+          
           // Success - return result
           return data.result;
         } catch (error) {